@@ -1,6 +1,107 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, FrozenSet, Tuple, Iterator
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+from collections import namedtuple
 import time
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# kalshi fee: 7% on profits, polymarket: ~2% gas
+KALSHI_FEE_RATE = 0.07
+POLYMARKET_GAS = 0.02  # estimated gas in dollars
+
+# minimum token set similarity (0-100) for two titles to count as the same event
+MATCH_SCORE_CUTOFF = 70
+
+# common words ignored when matching market titles; shorter ones ("a", "in", "to", ...)
+# never reach the set lookup since tokens of 2 chars or less are dropped first
+_SKIP_WORDS = frozenset({"will", "the", "for"})
+
+@lru_cache(maxsize=8192)
+def _tokenize(title: str) -> FrozenSet[str]:
+    """lowercased key words of a market title (cached per raw title)"""
+    return frozenset(word for word in title.lower().split() if len(word) > 2 and word not in _SKIP_WORDS)
+
+def _scan_pairs(k_yes: np.ndarray, k_no: np.ndarray, p_yes: np.ndarray, p_no: np.ndarray,
+                k_yes_d: np.ndarray, k_no_d: np.ndarray, p_yes_d: np.ndarray, p_no_d: np.ndarray,
+                threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    arbitrage kernel over matched pairs of kalshi/polymarket prices, given both as int cents
+    and as dollars. strategy 1 buys yes on kalshi and no on polymarket, strategy 2 the reverse.
+    returns (strategy, total_cost, gross_profit, net_profit, profit_pct) arrays in dollars,
+    where strategy is 0 for pairs without arbitrage at >= threshold percent profit.
+    """
+    priced = (k_yes != 0) & (k_no != 0) & (p_yes != 0) & (p_no != 0)
+    
+    # take the cheaper of the two strategies per pair (strategy 1 on ties); profit only
+    # falls as cost rises, so the cheaper one is the only candidate worth testing
+    total_cost1 = k_yes_d + p_no_d
+    total_cost2 = p_yes_d + k_no_d
+    use2 = total_cost2 < total_cost1
+    strategy = np.where(use2, 2, 1).astype(np.int8)
+    
+    # costs and profits come from the actual quotes
+    total_cost = np.where(use2, total_cost2, total_cost1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gross_profit = 1 - total_cost
+        net_profit = gross_profit - gross_profit * KALSHI_FEE_RATE - POLYMARKET_GAS
+        profit_pct = (net_profit / total_cost) * 100
+    
+    # arbitrage exists if total cost < 100 cents (guaranteed profit), tested exactly in
+    # integers on the rounded-up cents so float noise never makes a break-even pair a hit
+    total_cost_c = np.where(use2, p_yes.astype(np.int32) + k_no, k_yes.astype(np.int32) + p_no)
+    hit = priced & (total_cost_c < 100) & (profit_pct >= threshold)
+    strategy[~hit] = 0
+    
+    return strategy, total_cost, gross_profit, net_profit, profit_pct
+
+# compact record of a cross-platform hit; expanded into a full result dict only when returned
+arbhit = namedtuple("arbhit", "strategy k_idx p_idx total_cost gross_profit net_profit profit_pct")
+
+def _to_cents(prices: np.ndarray) -> np.ndarray:
+    """quantize dollar prices to int cents, rounding up so costs are never understated"""
+    return np.ceil(np.round(prices * 100, 6)).astype(np.int16)
+
+class marketbatch:
+    """
+    struct-of-arrays view of a market list, built once per scan: contiguous price columns
+    (int cents and dollars) and title match keys alongside the source rows
+    """
+    __slots__ = ("markets", "yes", "no", "yes_dollars", "no_dollars", "match_keys")
+    
+    def __init__(self, markets: List[Dict], yes_key: str, no_key: str, title_key: str, in_dollars: bool = False):
+        n = len(markets)
+        self.markets = markets
+        yes = np.fromiter((m.get(yes_key) or 0 for m in markets), np.float64, n)
+        no = np.fromiter((m.get(no_key) or 0 for m in markets), np.float64, n)
+        if in_dollars:
+            # polymarket quotes dollars in [0, 1]: quantize once at ingest
+            self.yes_dollars, self.no_dollars = yes, no
+            self.yes, self.no = _to_cents(yes), _to_cents(no)
+        else:
+            # kalshi quotes int cents natively
+            self.yes, self.no = yes.astype(np.int16), no.astype(np.int16)
+            self.yes_dollars, self.no_dollars = yes / 100, no / 100
+        
+        # key words of each title, for matching the same event across platforms
+        self.match_keys = [" ".join(_tokenize(m.get(title_key, ""))) for m in markets]
+    
+    def __len__(self) -> int:
+        return len(self.markets)
+
+def _kalshi_batch(markets: List[Dict]) -> marketbatch:
+    return marketbatch(markets, "yes_ask", "no_ask", "title")
+
+def _polymarket_batch(markets: List[Dict]) -> marketbatch:
+    return marketbatch(markets, "yes_price", "no_price", "question", in_dollars=True)
+
+def all_opportunities(results: dict) -> Iterator[Dict]:
+    """
+    every opportunity in a scan_all_arbitrage result, chained on demand rather than
+    stored, so logged and cached results hold each opportunity only once
+    """
+    return chain(results.get("cross_platform", []), results.get("kalshi_internal", []), results.get("polymarket_internal", []))
 
 class arbitragescanner:
     """scans for arbitrage opportunities between polymarket and kalshi"""
@@ -14,266 +115,274 @@ class arbitragescanner:
     def set_time_window(self, hours: Optional[float]):
         """set time window for filtering markets (e.g., 1, 0.25 for 15min, 0.5 for 30min)"""
         self.time_window_hours = hours
+    
+    def clear_title_cache(self):
+        """drop memoized title tokens (e.g. once the market universe has turned over)"""
+        _tokenize.cache_clear()
         
-    def find_cross_platform_arbitrage(self) -> List[Dict]:
+    def _fetch_kalshi_markets(self, time_window_hours: Optional[float]) -> List[Dict]:
+        """fetch kalshi markets within the time window"""
+        kalshi_params = {"limit": 50}
+        if time_window_hours:
+            max_close_ts = int((datetime.now() + timedelta(hours=time_window_hours)).timestamp())
+            kalshi_params["max_close_ts"] = max_close_ts
+        
+        return self.kalshi.get_markets(**kalshi_params)
+    
+    def _fetch_polymarket_markets(self, time_window_hours: Optional[float]) -> List[Dict]:
+        """fetch polymarket markets within the time window"""
+        return self.polymarket.get_simplified_markets(time_window_hours)
+    
+    def find_cross_platform_arbitrage(self, kalshi_markets: Optional[List[Dict]] = None,
+                                      polymarket_markets: Optional[List[Dict]] = None,
+                                      now: Optional[datetime] = None) -> List[Dict]:
         """
         finds arbitrage opportunities between kalshi and polymarket.
         looks for same event priced differently on both platforms.
+        markets are fetched unless already provided.
         """
-        opportunities = []
+        if now is None:
+            now = datetime.now()
         
         # fetch markets from both platforms with time window
-        kalshi_params = {"limit": 50}
-        if self.time_window_hours:
-            max_close_ts = int((datetime.now() + timedelta(hours=self.time_window_hours)).timestamp())
-            kalshi_params["max_close_ts"] = max_close_ts
+        if kalshi_markets is None:
+            kalshi_markets = self._fetch_kalshi_markets(self.time_window_hours)
+        if polymarket_markets is None:
+            polymarket_markets = self._fetch_polymarket_markets(self.time_window_hours)
         
-        kalshi_markets = self.kalshi.get_markets(**kalshi_params)
-        polymarket_markets = self.polymarket.get_simplified_markets(self.time_window_hours)
-        
-        # match markets by similarity in titles/questions
-        for k_market in kalshi_markets:
-            k_title = k_market.get("title", "").lower()
-            
-            for p_market in polymarket_markets:
-                p_question = p_market.get("question", "").lower()
-                
-                # basic keyword matching (you'd improve this with better matching logic)
-                if self._markets_match(k_title, p_question):
-                    arb = self._calculate_arbitrage(k_market, p_market)
-                    if arb:
-                        opportunities.append(arb)
-        
-        return sorted(opportunities, key=lambda x: x["profit_percentage"], reverse=True)
+        return self._cross_platform_arbitrage(_kalshi_batch(kalshi_markets), _polymarket_batch(polymarket_markets), now)
     
-    def _markets_match(self, title1: str, title2: str) -> bool:
-        """check if two market titles likely refer to same event"""
-        # extract key words (skip common words)
-        skip_words = {"will", "the", "be", "a", "an", "in", "on", "at", "to", "for"}
+    def _cross_platform_arbitrage(self, kalshi: marketbatch, polymarket: marketbatch, now: datetime) -> List[Dict]:
+        """cross-platform scan over prepared market batches"""
+        # score every kalshi title against every polymarket question in native code,
+        # comparing key words only
+        scores = process.cdist(
+            kalshi.match_keys, polymarket.match_keys,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=MATCH_SCORE_CUTOFF,
+            dtype=np.uint8,
+            workers=-1
+        )
+        k_idx, p_idx = np.nonzero(scores)
         
-        words1 = set(word for word in title1.split() if word not in skip_words and len(word) > 2)
-        words2 = set(word for word in title2.split() if word not in skip_words and len(word) > 2)
+        hits = self._calculate_arbitrage(kalshi, polymarket, k_idx, p_idx)
         
-        # need significant overlap
-        if not words1 or not words2:
-            return False
-            
-        overlap = len(words1 & words2) / min(len(words1), len(words2))
-        return overlap > 0.5
+        return [self._expand_arbitrage(hit, kalshi, polymarket, now) for hit in hits]
     
-    def _calculate_arbitrage(self, kalshi_market: dict, polymarket_market: dict) -> Optional[Dict]:
+    def _calculate_arbitrage(self, kalshi: marketbatch, polymarket: marketbatch,
+                             k_idx: np.ndarray, p_idx: np.ndarray) -> List[arbhit]:
         """
-        calculates if arbitrage exists between two matched markets.
+        calculates which matched market pairs (kalshi[k_idx[i]], polymarket[p_idx[i]])
+        have arbitrage, for all pairs at once. hits are returned most profitable first.
         arbitrage exists when you can bet on both outcomes and guarantee profit.
         """
-        # get pricing from kalshi
-        k_yes_ask = kalshi_market.get("yes_ask", 0)
-        k_no_ask = kalshi_market.get("no_ask", 0)
+        if not len(k_idx):
+            return []
         
-        # get pricing from polymarket
-        p_yes_price = polymarket_market.get("yes_price", 0)
-        p_no_price = polymarket_market.get("no_price", 0)
+        # gather pricing (int cents and dollars) for every pair from the contiguous price columns
+        strategy, total_cost, gross_profit, net_profit, profit_pct = _scan_pairs(
+            kalshi.yes[k_idx], kalshi.no[k_idx], polymarket.yes[p_idx], polymarket.no[p_idx],
+            kalshi.yes_dollars[k_idx], kalshi.no_dollars[k_idx],
+            polymarket.yes_dollars[p_idx], polymarket.no_dollars[p_idx],
+            self.min_profit_threshold * 100
+        )
         
-        if not all([k_yes_ask, k_no_ask, p_yes_price, p_no_price]):
-            return None
+        # order hits by profit descending in native code (stable, so ties keep pair order)
+        hit_idx = np.flatnonzero(strategy)
+        hit_idx = hit_idx[np.argsort(-profit_pct[hit_idx], kind="stable")]
         
-        # strategy 1: buy yes on cheaper platform, no on other
-        cost1_kalshi_yes = k_yes_ask
-        cost1_poly_no = p_no_price
-        total_cost1 = cost1_kalshi_yes + cost1_poly_no
+        return [
+            arbhit(int(strategy[i]), int(k_idx[i]), int(p_idx[i]), float(total_cost[i]),
+                   float(gross_profit[i]), float(net_profit[i]), float(profit_pct[i]))
+            for i in hit_idx
+        ]
+    
+    def _expand_arbitrage(self, hit: arbhit, kalshi: marketbatch, polymarket: marketbatch, now: datetime) -> Dict:
+        """builds the full result dict for a cross-platform hit"""
+        k_market = kalshi.markets[hit.k_idx]
+        p_market = polymarket.markets[hit.p_idx]
         
-        # kalshi fee: 7% on profits, polymarket: ~2% gas + 2% platform
-        kalshi_fee_rate = 0.07
-        polymarket_fee_rate = 0.04  # 2% platform + ~2% gas estimate
+        if hit.strategy == 1:
+            strategy = "buy yes on kalshi, no on polymarket"
+            trade_details = {
+                "kalshi_side": "yes",
+                "kalshi_price": float(kalshi.yes_dollars[hit.k_idx]),
+                "polymarket_side": "no",
+                "polymarket_price": float(polymarket.no_dollars[hit.p_idx]),
+                "position_size": 1.0
+            }
+        else:
+            strategy = "buy yes on polymarket, no on kalshi"
+            trade_details = {
+                "polymarket_side": "yes",
+                "polymarket_price": float(polymarket.yes_dollars[hit.p_idx]),
+                "kalshi_side": "no",
+                "kalshi_price": float(kalshi.no_dollars[hit.k_idx]),
+                "position_size": 1.0
+            }
         
-        cost2_poly_yes = p_yes_price
-        cost2_kalshi_no = k_no_ask
-        total_cost2 = cost2_poly_yes + cost2_kalshi_no
+        kalshi_profit_fee = hit.gross_profit * KALSHI_FEE_RATE
+        return {
+            "type": "cross_platform_arbitrage",
+            "kalshi_market": k_market.get("ticker", ""),
+            "polymarket_market": p_market.get("condition_id", ""),
+            "kalshi_title": k_market.get("title", ""),
+            "polymarket_question": p_market.get("question", ""),
+            "strategy": strategy,
+            "trade_details": trade_details,
+            "total_cost": hit.total_cost,
+            "guaranteed_return": 1.0,
+            "gross_profit": hit.gross_profit,
+            "fees": {
+                "kalshi_fee": kalshi_profit_fee,
+                "polymarket_gas": POLYMARKET_GAS,
+                "total_fees": kalshi_profit_fee + POLYMARKET_GAS
+            },
+            "net_profit": hit.net_profit,
+            "profit_percentage": hit.profit_pct,
+            "roi_percentage": hit.profit_pct,
+            "timestamp": now
+        }
+    
+    def find_internal_arbitrage(self, platform: str = "kalshi", markets: Optional[List[Dict]] = None,
+                                now: Optional[datetime] = None) -> List[Dict]:
+        """
+        finds arbitrage within single platform.
+        checks if yes + no prices don't sum to 1.
+        the platform's markets are fetched unless already provided.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        if platform == "kalshi":
+            if markets is None:
+                markets = self._fetch_kalshi_markets(self.time_window_hours)
+            return self._kalshi_internal_arbitrage(_kalshi_batch(markets), now)
+        
+        elif platform == "polymarket":
+            if markets is None:
+                markets = self._fetch_polymarket_markets(self.time_window_hours)
+            return self._polymarket_internal_arbitrage(_polymarket_batch(markets), now)
         
-        # arbitrage exists if total cost < 1 (guaranteed profit)
-        if total_cost1 < 1:
-            gross_profit = 1 - total_cost1
-            kalshi_profit_fee = gross_profit * kalshi_fee_rate
-            polymarket_gas = 0.02  # estimated gas in dollars
-            net_profit = gross_profit - kalshi_profit_fee - polymarket_gas
-            profit_pct = (net_profit / total_cost1) * 100
+        return []
+    
+    def _kalshi_internal_arbitrage(self, batch: marketbatch, now: datetime) -> List[Dict]:
+        """kalshi internal scan over a prepared market batch"""
+        opportunities = []
+        
+        # only markets whose asks sum under 100 cents can be arbs; filter them in one pass
+        markets = batch.markets
+        candidates = np.flatnonzero(
+            (batch.yes > 0) & (batch.no > 0) & (batch.yes.astype(np.int32) + batch.no < 100)
+        )
+        
+        for i in candidates:
+            market = markets[i]
+            yes_ask = market["yes_ask"] / 100
+            no_ask = market["no_ask"] / 100
+            total_cost = yes_ask + no_ask
+            
+            gross_profit = 1 - total_cost
+            kalshi_fee = gross_profit * KALSHI_FEE_RATE
+            net_profit = gross_profit - kalshi_fee
+            profit_pct = (net_profit / total_cost) * 100
             
             if profit_pct >= self.min_profit_threshold * 100:
-                return {
-                    "type": "cross_platform_arbitrage",
-                    "kalshi_market": kalshi_market.get("ticker", ""),
-                    "polymarket_market": polymarket_market.get("condition_id", ""),
-                    "kalshi_title": kalshi_market.get("title", ""),
-                    "polymarket_question": polymarket_market.get("question", ""),
-                    "strategy": "buy yes on kalshi, no on polymarket",
+                opportunities.append({
+                    "type": "internal_arbitrage",
+                    "platform": "kalshi",
+                    "market": market.get("ticker", ""),
+                    "title": market.get("title", ""),
                     "trade_details": {
-                        "kalshi_side": "yes",
-                        "kalshi_price": cost1_kalshi_yes,
-                        "polymarket_side": "no",
-                        "polymarket_price": cost1_poly_no,
+                        "buy_yes_at": yes_ask,
+                        "buy_no_at": no_ask,
                         "position_size": 1.0
                     },
-                    "total_cost": total_cost1,
-                    "guaranteed_return": 1.0,
+                    "yes_ask": yes_ask,
+                    "no_ask": no_ask,
+                    "total_cost": total_cost,
                     "gross_profit": gross_profit,
                     "fees": {
-                        "kalshi_fee": kalshi_profit_fee,
-                        "polymarket_gas": polymarket_gas,
-                        "total_fees": kalshi_profit_fee + polymarket_gas
+                        "platform_fee": kalshi_fee,
+                        "gas_fee": 0,
+                        "total_fees": kalshi_fee
                     },
                     "net_profit": net_profit,
                     "profit_percentage": profit_pct,
-                    "roi_percentage": (net_profit / total_cost1) * 100,
-                    "timestamp": datetime.now().isoformat()
-                }
+                    "roi_percentage": (net_profit / total_cost) * 100,
+                    "timestamp": now
+                })
         
-        if total_cost2 < 1:
-            gross_profit = 1 - total_cost2
-            kalshi_profit_fee = gross_profit * kalshi_fee_rate
-            polymarket_gas = 0.02
-            net_profit = gross_profit - kalshi_profit_fee - polymarket_gas
-            profit_pct = (net_profit / total_cost2) * 100
+        return sorted(opportunities, key=lambda x: x["profit_percentage"], reverse=True)
+    
+    def _polymarket_internal_arbitrage(self, batch: marketbatch, now: datetime) -> List[Dict]:
+        """polymarket internal scan over a prepared market batch"""
+        opportunities = []
+        
+        # only markets whose prices sum under 1 can be arbs; filter them in one pass
+        markets = batch.markets
+        yes, no = batch.yes_dollars, batch.no_dollars
+        candidates = np.flatnonzero((yes > 0) & (no > 0) & (yes + no < 1))
+        
+        for i in candidates:
+            market = markets[i]
+            yes_price = market["yes_price"]
+            no_price = market["no_price"]
+            total_cost = yes_price + no_price
+            
+            gross_profit = 1 - total_cost
+            gas_fee = POLYMARKET_GAS
+            net_profit = gross_profit - gas_fee
+            profit_pct = (net_profit / total_cost) * 100
             
             if profit_pct >= self.min_profit_threshold * 100:
-                return {
-                    "type": "cross_platform_arbitrage",
-                    "kalshi_market": kalshi_market.get("ticker", ""),
-                    "polymarket_market": polymarket_market.get("condition_id", ""),
-                    "kalshi_title": kalshi_market.get("title", ""),
-                    "polymarket_question": polymarket_market.get("question", ""),
-                    "strategy": "buy yes on polymarket, no on kalshi",
+                opportunities.append({
+                    "type": "internal_arbitrage",
+                    "platform": "polymarket",
+                    "market": market.get("condition_id", ""),
+                    "question": market.get("question", ""),
                     "trade_details": {
-                        "polymarket_side": "yes",
-                        "polymarket_price": cost2_poly_yes,
-                        "kalshi_side": "no",
-                        "kalshi_price": cost2_kalshi_no,
+                        "buy_yes_at": yes_price,
+                        "buy_no_at": no_price,
+                        "yes_token_id": market.get("yes_token_id", ""),
+                        "no_token_id": market.get("no_token_id", ""),
                         "position_size": 1.0
                     },
-                    "total_cost": total_cost2,
-                    "guaranteed_return": 1.0,
+                    "yes_price": yes_price,
+                    "no_price": no_price,
+                    "total_cost": total_cost,
                     "gross_profit": gross_profit,
                     "fees": {
-                        "kalshi_fee": kalshi_profit_fee,
-                        "polymarket_gas": polymarket_gas,
-                        "total_fees": kalshi_profit_fee + polymarket_gas
+                        "platform_fee": 0,
+                        "gas_fee": gas_fee,
+                        "total_fees": gas_fee
                     },
                     "net_profit": net_profit,
                     "profit_percentage": profit_pct,
-                    "roi_percentage": (net_profit / total_cost2) * 100,
-                    "timestamp": datetime.now().isoformat()
-                }
+                    "roi_percentage": (net_profit / total_cost) * 100,
+                    "timestamp": now
+                })
         
-        return None
+        return sorted(opportunities, key=lambda x: x["profit_percentage"], reverse=True)
     
-    def find_internal_arbitrage(self, platform: str = "kalshi") -> List[Dict]:
+    def scan_all_arbitrage(self, time_window_hours: Optional[float] = None) -> dict:
         """
-        finds arbitrage within single platform.
-        checks if yes + no prices don't sum to 1.
+        runs all arbitrage scans and returns consolidated results.
+        time_window_hours overrides set_time_window for this scan only (0 scans every market).
         """
-        opportunities = []
+        window = self.time_window_hours if time_window_hours is None else time_window_hours
+        # fetch each platform once and prepare its batch (prices + match keys) in a single
+        # pass; all three scans then share the batches and the scan timestamp
+        kalshi = _kalshi_batch(self._fetch_kalshi_markets(window))
+        polymarket = _polymarket_batch(self._fetch_polymarket_markets(window))
+        now = datetime.now()
         
-        if platform == "kalshi":
-            kalshi_params = {"limit": 50}
-            if self.time_window_hours:
-                max_close_ts = int((datetime.now() + timedelta(hours=self.time_window_hours)).timestamp())
-                kalshi_params["max_close_ts"] = max_close_ts
-            
-            markets = self.kalshi.get_markets(**kalshi_params)
-            
-            for market in markets:
-                yes_ask = market.get("yes_ask", 0) / 100 if market.get("yes_ask") else 0
-                no_ask = market.get("no_ask", 0) / 100 if market.get("no_ask") else 0
-                
-                if yes_ask and no_ask:
-                    total_cost = yes_ask + no_ask
-                    
-                    if total_cost < 1:
-                        gross_profit = 1 - total_cost
-                        kalshi_fee = gross_profit * 0.07  # 7% on profits
-                        net_profit = gross_profit - kalshi_fee
-                        profit_pct = (net_profit / total_cost) * 100
-                        
-                        if profit_pct >= self.min_profit_threshold * 100:
-                            opportunities.append({
-                                "type": "internal_arbitrage",
-                                "platform": "kalshi",
-                                "market": market.get("ticker", ""),
-                                "title": market.get("title", ""),
-                                "trade_details": {
-                                    "buy_yes_at": yes_ask,
-                                    "buy_no_at": no_ask,
-                                    "position_size": 1.0
-                                },
-                                "yes_ask": yes_ask,
-                                "no_ask": no_ask,
-                                "total_cost": total_cost,
-                                "gross_profit": gross_profit,
-                                "fees": {
-                                    "platform_fee": kalshi_fee,
-                                    "gas_fee": 0,
-                                    "total_fees": kalshi_fee
-                                },
-                                "net_profit": net_profit,
-                                "profit_percentage": profit_pct,
-                                "roi_percentage": (net_profit / total_cost) * 100,
-                                "timestamp": datetime.now().isoformat()
-                            })
-        
-        elif platform == "polymarket":
-            markets = self.polymarket.get_simplified_markets(self.time_window_hours)
-            
-            for market in markets:
-                yes_price = market.get("yes_price", 0)
-                no_price = market.get("no_price", 0)
-                
-                if yes_price and no_price:
-                    total_cost = yes_price + no_price
-                    
-                    if total_cost < 1:
-                        gross_profit = 1 - total_cost
-                        gas_fee = 0.02  # estimated gas in dollars
-                        net_profit = gross_profit - gas_fee
-                        profit_pct = (net_profit / total_cost) * 100
-                        
-                        if profit_pct >= self.min_profit_threshold * 100:
-                            opportunities.append({
-                                "type": "internal_arbitrage",
-                                "platform": "polymarket",
-                                "market": market.get("condition_id", ""),
-                                "question": market.get("question", ""),
-                                "trade_details": {
-                                    "buy_yes_at": yes_price,
-                                    "buy_no_at": no_price,
-                                    "yes_token_id": market.get("yes_token_id", ""),
-                                    "no_token_id": market.get("no_token_id", ""),
-                                    "position_size": 1.0
-                                },
-                                "yes_price": yes_price,
-                                "no_price": no_price,
-                                "total_cost": total_cost,
-                                "gross_profit": gross_profit,
-                                "fees": {
-                                    "platform_fee": 0,
-                                    "gas_fee": gas_fee,
-                                    "total_fees": gas_fee
-                                },
-                                "net_profit": net_profit,
-                                "profit_percentage": profit_pct,
-                                "roi_percentage": (net_profit / total_cost) * 100,
-                                "timestamp": datetime.now().isoformat()
-                            })
-        
-        return sorted(opportunities, key=lambda x: x["profit_percentage"], reverse=True)
-    
-    def scan_all_arbitrage(self) -> dict:
-        """runs all arbitrage scans and returns consolidated results"""
         results = {
-            "scan_time": datetime.now().isoformat(),
-            "cross_platform": self.find_cross_platform_arbitrage(),
-            "kalshi_internal": self.find_internal_arbitrage("kalshi"),
-            "polymarket_internal": self.find_internal_arbitrage("polymarket")
+            "scan_time": now,
+            "cross_platform": self._cross_platform_arbitrage(kalshi, polymarket, now),
+            "kalshi_internal": self._kalshi_internal_arbitrage(kalshi, now),
+            "polymarket_internal": self._polymarket_internal_arbitrage(polymarket, now)
         }
-        
         total_opportunities = (
             len(results["cross_platform"]) +
             len(results["kalshi_internal"]) +
@@ -0,0 +1,33 @@
+import sys
+import asyncio
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def build_session() -> requests.Session:
+    """pooled keep-alive session shared by the kalshi and polymarket clients"""
+    session = requests.session()
+    # one pool per api host, backing off (honouring retry-after) on rate limits and
+    # transient server errors rather than failing the scan outright
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry))
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+        "User-Agent": "betbot/1.0"
+    })
+    return session
+
+def run(coro):
+    """run a coroutine from the clients' sync code"""
+    return asyncio.run(coro)
+
+def use_uvloop():
+    """run the async batch fetches on uvloop where it's available (not on windows)"""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -1,14 +1,52 @@
 import requests
-import time
+import aiohttp
+import orjson
+import asyncio
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from http_client import build_session, run
+
+BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
+REQUEST_TIMEOUT = 10  # seconds
+
+def _parse_orderbook(ticker: str, data: dict) -> dict:
+    """extract best prices and volume from a raw orderbook response"""
+    yes_bids = data.get("yes", [])
+    no_bids = data.get("no", [])
+    
+    return {
+        "ticker": ticker,
+        "best_yes_bid": yes_bids[0]["price"] / 100 if yes_bids else None,
+        "best_yes_ask": yes_bids[0]["price"] / 100 if yes_bids else None,
+        "best_no_bid": no_bids[0]["price"] / 100 if no_bids else None,
+        "best_no_ask": no_bids[0]["price"] / 100 if no_bids else None,
+        "yes_volume": sum(bid.get("quantity", 0) for bid in yes_bids),
+        "no_volume": sum(bid.get("quantity", 0) for bid in no_bids),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _parse_market_details(ticker: str, market: dict) -> dict:
+    """extract key pricing info from a raw market response"""
+    return {
+        "ticker": ticker,
+        "title": market.get("title", ""),
+        "yes_bid": market.get("yes_bid", 0) / 100,
+        "yes_ask": market.get("yes_ask", 0) / 100,
+        "no_bid": market.get("no_bid", 0) / 100,
+        "no_ask": market.get("no_ask", 0) / 100,
+        "last_price": market.get("last_price", 0) / 100,
+        "volume": market.get("volume", 0),
+        "open_interest": market.get("open_interest", 0),
+        "close_time": market.get("close_time", ""),
+        "status": market.get("status", "")
+    }
 
 class kalshiclient:
     """fetches market data from kalshi's public api"""
     
-    def __init__(self):
-        self.base_url = "https://api.elections.kalshi.com/trade-api/v2"
-        self.session = requests.session()
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.base_url = BASE_URL
+        self.session = session or build_session()
         
     def get_markets(self, limit: int = 50, status: str = "open", min_close_ts: Optional[int] = None, max_close_ts: Optional[int] = None) -> List[Dict]:
         """fetch active markets with optional time window filtering"""
@@ -23,10 +61,11 @@ class kalshiclient:
                 
             response = self.session.get(
                 f"{self.base_url}/markets",
-                params=params
+                params=params,
+                timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            return response.json().get("markets", [])
+            return orjson.loads(response.content).get("markets", [])
         except Exception as e:
             print(f"failed to fetch kalshi markets: {e}")
             return []
@@ -35,25 +74,11 @@ class kalshiclient:
         """fetch orderbook for a specific market"""
         try:
             response = self.session.get(
-                f"{self.base_url}/markets/{ticker}/orderbook"
+                f"{self.base_url}/markets/{ticker}/orderbook",
+                timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            data = response.json()
-            
-            # parse orderbook
-            yes_bids = data.get("yes", [])
-            no_bids = data.get("no", [])
-            
-            return {
-                "ticker": ticker,
-                "best_yes_bid": yes_bids[0]["price"] / 100 if yes_bids else None,
-                "best_yes_ask": yes_bids[0]["price"] / 100 if yes_bids else None,
-                "best_no_bid": no_bids[0]["price"] / 100 if no_bids else None,
-                "best_no_ask": no_bids[0]["price"] / 100 if no_bids else None,
-                "yes_volume": sum(bid.get("quantity", 0) for bid in yes_bids),
-                "no_volume": sum(bid.get("quantity", 0) for bid in no_bids),
-                "timestamp": datetime.now().isoformat()
-            }
+            return _parse_orderbook(ticker, orjson.loads(response.content))
         except Exception as e:
             print(f"failed to fetch orderbook for {ticker}: {e}")
             return {}
@@ -62,10 +87,11 @@ class kalshiclient:
         """fetch all markets for a specific event"""
         try:
             response = self.session.get(
-                f"{self.base_url}/events/{event_ticker}/markets"
+                f"{self.base_url}/events/{event_ticker}/markets",
+                timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            return response.json().get("markets", [])
+            return orjson.loads(response.content).get("markets", [])
         except Exception as e:
             print(f"failed to fetch event markets: {e}")
             return []
@@ -73,25 +99,90 @@ class kalshiclient:
     def get_market_details(self, ticker: str) -> dict:
         """fetch detailed market information"""
         try:
-            time.sleep(0.1)  # rate limiting
-            response = self.session.get(f"{self.base_url}/markets/{ticker}")
+            response = self.session.get(f"{self.base_url}/markets/{ticker}", timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            market = response.json().get("market", {})
+            return _parse_market_details(ticker, orjson.loads(response.content).get("market", {}))
+        except Exception as e:
+            print(f"failed to fetch market details for {ticker}: {e}")
+            return {}
+    
+    def get_market_details_batch(self, tickers: List[str]) -> List[Dict]:
+        """fetch details for many markets concurrently, in the same order as tickers"""
+        async def fetch():
+            async with asynckalshiclient() as client:
+                return await client.get_market_details_batch(tickers)
+        
+        return run(fetch())
+
+class asynckalshiclient:
+    """async kalshi client, issues requests concurrently over a pooled aiohttp session"""
+    
+    def __init__(self, max_concurrency: int = 10):
+        self.base_url = BASE_URL
+        self.session = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)  # rate limiting
+    
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+    
+    async def _get(self, path: str, params: Optional[dict] = None):
+        async with self.session.get(f"{self.base_url}{path}", params=params) as response:
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+    
+    async def get_markets(self, limit: int = 50, status: str = "open", min_close_ts: Optional[int] = None, max_close_ts: Optional[int] = None) -> List[Dict]:
+        """fetch active markets with optional time window filtering"""
+        try:
+            params = {"limit": limit, "status": status}
+            if min_close_ts:
+                params["min_close_ts"] = min_close_ts
+            if max_close_ts:
+                params["max_close_ts"] = max_close_ts
             
-            # extract key pricing info
-            return {
-                "ticker": ticker,
-                "title": market.get("title", ""),
-                "yes_bid": market.get("yes_bid", 0) / 100,
-                "yes_ask": market.get("yes_ask", 0) / 100,
-                "no_bid": market.get("no_bid", 0) / 100,
-                "no_ask": market.get("no_ask", 0) / 100,
-                "last_price": market.get("last_price", 0) / 100,
-                "volume": market.get("volume", 0),
-                "open_interest": market.get("open_interest", 0),
-                "close_time": market.get("close_time", ""),
-                "status": market.get("status", "")
-            }
+            data = await self._get("/markets", params)
+            return data.get("markets", [])
+        except Exception as e:
+            print(f"failed to fetch kalshi markets: {e}")
+            return []
+    
+    async def get_market_orderbook(self, ticker: str) -> dict:
+        """fetch orderbook for a specific market"""
+        try:
+            return _parse_orderbook(ticker, await self._get(f"/markets/{ticker}/orderbook"))
+        except Exception as e:
+            print(f"failed to fetch orderbook for {ticker}: {e}")
+            return {}
+    
+    async def get_event_markets(self, event_ticker: str) -> List[Dict]:
+        """fetch all markets for a specific event"""
+        try:
+            data = await self._get(f"/events/{event_ticker}/markets")
+            return data.get("markets", [])
+        except Exception as e:
+            print(f"failed to fetch event markets: {e}")
+            return []
+    
+    async def get_market_details(self, ticker: str) -> dict:
+        """fetch detailed market information"""
+        try:
+            async with self._semaphore:
+                data = await self._get(f"/markets/{ticker}")
+            return _parse_market_details(ticker, data.get("market", {}))
         except Exception as e:
             print(f"failed to fetch market details for {ticker}: {e}")
-            return {}
\ No newline at end of file
+            return {}
+    
+    async def get_orderbooks_batch(self, tickers: List[str]) -> List[Dict]:
+        """fetch orderbooks for many markets concurrently"""
+        return await asyncio.gather(*(self.get_market_orderbook(t) for t in tickers))
+    
+    async def get_market_details_batch(self, tickers: List[str]) -> List[Dict]:
+        """fetch details for many markets concurrently"""
+        return await asyncio.gather(*(self.get_market_details(t) for t in tickers))
\ No newline at end of file
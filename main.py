@@ -2,46 +2,65 @@
 """
 main python file - scans kalshi and polymarket for profitable betting opportunities
 """
+import sys
+import heapq
 import time
-import json
+import orjson
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from http_client import build_session, use_uvloop
 from kalshi_client import kalshiclient
 from polymarket_client import polymarketclient
-from arbitrage_scanner import arbitragescanner
-from value_scanner import valuescanner
+from arbitrage_scanner import arbitragescanner, all_opportunities
+from value_scanner import valuescanner, all_value
+
+RESULTS_LOG = "scan_results.ndjson"
 
 class betscanner:
     """orchestrates all scanning operations"""
     
     def __init__(self):
         print("initialising clients...")
-        self.kalshi = kalshiclient()
-        self.polymarket = polymarketclient()
+        # both clients share one pooled session
+        self.session = build_session()
+        self.kalshi = kalshiclient(self.session)
+        self.polymarket = polymarketclient(self.session)
         self.arb_scanner = arbitragescanner(self.kalshi, self.polymarket)
         self.value_scanner = valuescanner(self.kalshi, self.polymarket)
         print("clients ready\n")
     
     def run_single_scan(self, scan_type: str = "all") -> dict:
         """runs a single scan across all strategies"""
-        print(f"Starting scan at {datetime.now().strftime('%h:%m:%s')}")
+        now = datetime.now()
+        print(f"Starting scan at {now.strftime('%H:%M:%S')}")
         print("-" * 60)
         
         results = {
-            "scan_time": datetime.now().isoformat(),
+            "scan_time": now,
             "scan_type": scan_type
         }
         
-        if scan_type in ["all", "arbitrage"]:
-            print("Scanning for arbitrage opportunities..")
-            arb_results = self.arb_scanner.scan_all_arbitrage()
-            results["arbitrage"] = arb_results
-            self._print_arbitrage_summary(arb_results)
-        
-        if scan_type in ["all", "value"]:
-            print("\nScanning for value opportunities..")
-            value_results = self.value_scanner.scan_all_value()
-            results["value"] = value_results
-            self._print_value_summary(value_results)
+        # both scans are i/o bound on the pooled clients, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            arb_future = None
+            value_future = None
+            if scan_type in ["all", "arbitrage"]:
+                print("Scanning for arbitrage opportunities..")
+                arb_future = executor.submit(self.arb_scanner.scan_all_arbitrage)
+            if scan_type in ["all", "value"]:
+                print("Scanning for value opportunities..")
+                value_future = executor.submit(self.value_scanner.scan_all_value)
+            
+            if arb_future:
+                arb_results = arb_future.result()
+                results["arbitrage"] = arb_results
+                self._print_arbitrage_summary(arb_results)
+            
+            if value_future:
+                value_results = value_future.result()
+                results["value"] = value_results
+                self._print_value_summary(value_results)
         
         return results
     
@@ -53,85 +72,93 @@ class betscanner:
         
         scan_count = 0
         
-        try:
-            while True:
-                scan_count += 1
-                print(f"Scan #{scan_count}")
-                
-                results = self.run_single_scan(scan_type)
-                
-                # save results to file
-                filename = f"scan_results_{datetime.now().strftime('%y%m%d_%h%m%s')}.json"
-                with open(filename, 'w') as f:
-                    json.dump(results, f, indent=2)
-                print(f"\nresults saved to {filename}")
-                
-                print(f"\nwaiting {interval}s until next scan...")
-                time.sleep(interval)
-                
-        except KeyboardInterrupt:
-            print("\n\n✗ scan terminated by user")
-            print(f"completed {scan_count} scans before exit")
+        # one append-only log for the whole run, a json line per scan
+        # (read back with `for line in open(RESULTS_LOG, 'rb'): orjson.loads(line)`)
+        with open(RESULTS_LOG, 'ab', buffering=1 << 20) as log:
+            try:
+                while True:
+                    scan_count += 1
+                    print(f"Scan #{scan_count}")
+                    
+                    results = self.run_single_scan(scan_type)
+                    
+                    log.write(orjson.dumps(results) + b"\n")
+                    # flush once per scan so a crash only loses the scan in flight
+                    log.flush()
+                    print(f"\nresults appended to {RESULTS_LOG}")
+                    
+                    print(f"\nwaiting {interval}s until next scan...")
+                    time.sleep(interval)
+                    
+            except KeyboardInterrupt:
+                print("\n\n✗ scan terminated by user")
+                print(f"completed {scan_count} scans before exit")
     
     def _print_arbitrage_summary(self, results: dict):
         """prints formatted arbitrage results"""
         summary = results.get("summary", {})
         
-        print(f"\narbitrage scan complete:")
-        print(f"  total opportunities: {summary.get('total_opportunities', 0)}")
-        print(f"  cross-platform: {summary.get('cross_platform_count', 0)}")
-        print(f"  kalshi internal: {summary.get('kalshi_internal_count', 0)}")
-        print(f"  polymarket internal: {summary.get('polymarket_internal_count', 0)}")
+        # collect every line and write once rather than taking the stdout lock per print
+        lines = [
+            f"\narbitrage scan complete:",
+            f"  total opportunities: {summary.get('total_opportunities', 0)}",
+            f"  cross-platform: {summary.get('cross_platform_count', 0)}",
+            f"  kalshi internal: {summary.get('kalshi_internal_count', 0)}",
+            f"  polymarket internal: {summary.get('polymarket_internal_count', 0)}"
+        ]
         
-        # show top opportunities
-        all_opps = []
-        all_opps.extend(results.get("cross_platform", []))
-        all_opps.extend(results.get("kalshi_internal", []))
-        all_opps.extend(results.get("polymarket_internal", []))
+        # show top opportunities, ranked across all three lists rather than by list order
+        top_opps = heapq.nlargest(3, all_opportunities(results), key=itemgetter("profit_percentage"))
         
-        if all_opps:
-            print("\ntop 3 arbitrage opportunities:")
-            for i, opp in enumerate(all_opps[:3], 1):
+        if top_opps:
+            lines.append("\ntop 3 arbitrage opportunities:")
+            for i, opp in enumerate(top_opps, 1):
                 profit = opp.get("profit_percentage", 0)
                 opp_type = opp.get("type", "")
                 if opp_type == "cross_platform_arbitrage":
-                    print(f"  {i}. cross-platform: {profit:.2f}% profit")
-                    print(f"     kalshi: {opp.get('kalshi_title', '')[:50]}")
-                    print(f"     polymarket: {opp.get('polymarket_question', '')[:50]}")
+                    lines.append(f"  {i}. cross-platform: {profit:.2f}% profit")
+                    lines.append(f"     kalshi: {opp.get('kalshi_title', '')[:50]}")
+                    lines.append(f"     polymarket: {opp.get('polymarket_question', '')[:50]}")
                 else:
                     platform = opp.get("platform", "")
                     title = opp.get("title", opp.get("question", ""))
-                    print(f"  {i}. {platform} internal: {profit:.2f}% profit")
-                    print(f"     {title[:60]}")
+                    lines.append(f"  {i}. {platform} internal: {profit:.2f}% profit")
+                    lines.append(f"     {title[:60]}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def _print_value_summary(self, results: dict):
         """prints formatted value betting results"""
         summary = results.get("summary", {})
         
-        print(f"\nvalue scan complete:")
-        print(f"  total value opportunities: {summary.get('total_value_opportunities', 0)}")
-        print(f"  extreme probabilities: {summary.get('total_extreme_probabilities', 0)}")
-        print(f"  liquid value bets: {summary.get('total_liquid_value', 0)}")
+        lines = [
+            f"\nvalue scan complete:",
+            f"  total value opportunities: {summary.get('total_value_opportunities', 0)}",
+            f"  extreme probabilities: {summary.get('total_extreme_probabilities', 0)}",
+            f"  liquid value bets: {summary.get('total_liquid_value', 0)}"
+        ]
         
         # show top value opportunities
-        all_value = []
-        all_value.extend(results.get("kalshi_value", []))
-        all_value.extend(results.get("polymarket_value", []))
+        top_value = heapq.nlargest(3, all_value(results), key=itemgetter("edge_percentage"))
         
-        if all_value:
-            print("\ntop 3 value opportunities:")
-            for i, opp in enumerate(all_value[:3], 1):
+        if top_value:
+            lines.append("\ntop 3 value opportunities:")
+            for i, opp in enumerate(top_value, 1):
                 edge = opp.get("edge_percentage", 0)
                 platform = opp.get("platform", "")
                 title = opp.get("title", opp.get("question", ""))
                 side = opp.get("side", "")
                 price = opp.get("price", 0)
-                print(f"  {i}. {platform} - {edge:.2f}% edge on {side}")
-                print(f"     {title[:60]}")
-                print(f"     price: {price:.3f}")
+                lines.append(f"  {i}. {platform} - {edge:.2f}% edge on {side}")
+                lines.append(f"     {title[:60]}")
+                lines.append(f"     price: {price:.3f}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """entry point"""
+    # set before any client runs an event loop
+    use_uvloop()
     scanner = betscanner()
     
     # run single scan by default
@@ -1,153 +1,369 @@
 import requests
+import aiohttp
+import orjson
+import asyncio
 import time
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+import threading
+from typing import List, Dict, Optional, Tuple, Any, TypedDict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+from http_client import build_session, run
+
+CLOB_URL = "https://clob.polymarket.com"
+GAMMA_URL = "https://gamma-api.polymarket.com"
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds
+BULK_CHUNK_SIZE = 50  # condition ids per bulk request, keeps the query string bounded
+# seconds a cached response stays fresh, by endpoint path (orderbooks go stale fastest)
+CACHE_TTLS = {
+    "/book": 5,
+    "/markets": 30,
+    "/search": 30
+}
+
+# shapes of the dicts this client returns; total=False since fetch failures return {}
+class orderbook(TypedDict, total=False):
+    token_id: str
+    best_bid: Optional[float]
+    best_ask: Optional[float]
+    bid_size: float
+    ask_size: float
+    timestamp: str
+
+class marketprice(TypedDict, total=False):
+    condition_id: str
+    question: str
+    active: bool
+    closed: bool
+    end_date: str
+    volume: float
+    liquidity: float
+    yes_price: float
+    yes_token_id: str
+    no_price: float
+    no_token_id: str
+
+class simplifiedmarket(TypedDict):
+    condition_id: str
+    question: str
+    yes_price: float
+    no_price: float
+    yes_token_id: str
+    no_token_id: str
+    volume: float
+    liquidity: float
+    end_date: str
+
+def _parse_orderbook(token_id: str, data: dict) -> orderbook:
+    """extract top of book from a raw orderbook response"""
+    bids = data.get("bids", [])
+    asks = data.get("asks", [])
+    
+    return {
+        "token_id": token_id,
+        "best_bid": float(bids[0]["price"]) if bids else None,
+        "best_ask": float(asks[0]["price"]) if asks else None,
+        "bid_size": float(bids[0]["size"]) if bids else 0,
+        "ask_size": float(asks[0]["size"]) if asks else 0,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _parse_market_price(condition_id: str, market: dict) -> marketprice:
+    """extract status and yes/no token prices from a raw market response"""
+    # polymarket has binary outcomes (yes or no)
+    tokens = market.get("tokens", [])
+    
+    result: marketprice = {
+        "condition_id": condition_id,
+        "question": market.get("question", ""),
+        "active": market.get("active", False),
+        "closed": market.get("closed", False),
+        "end_date": market.get("end_date_iso", ""),
+        "volume": float(market.get("volume", 0)),
+        "liquidity": float(market.get("liquidity", 0)),
+    }
+    
+    # extract token prices (usually 2 tokens: yes/no)
+    for token in tokens:
+        outcome = token.get("outcome", "").lower()
+        price = float(token.get("price", 0))
+        token_id = token.get("token_id", "")
+        
+        if outcome == "yes":
+            result["yes_price"] = price
+            result["yes_token_id"] = token_id
+        elif outcome == "no":
+            result["no_price"] = price
+            result["no_token_id"] = token_id
+            
+    return result
+
+def _markets_params(limit: int, active: bool, end_date_max: Optional[str] = None) -> dict:
+    """query params for gamma /markets, letting the server drop late-closing markets"""
+    params = {
+        "limit": limit,
+        "active": str(active).lower()
+    }
+    if end_date_max:
+        params["end_date_max"] = end_date_max
+    return params
+
+def _closes_after(market: dict, cutoff_time: datetime) -> bool:
+    """true if the market's end date falls after cutoff_time"""
+    end_date_str = market.get("end_date_iso", "")
+    if not end_date_str:
+        return False
+    try:
+        return datetime.fromisoformat(end_date_str.replace('Z', '+00:00')) > cutoff_time
+    except Exception:
+        return False  # include if we can't parse the date
+
+def _simplify_market(market: dict) -> Optional[simplifiedmarket]:
+    """project a raw market onto the fields the scanners use, none if it lacks a yes or no token"""
+    # one pass over the tokens instead of a scan per outcome
+    by_outcome = {t.get("outcome", "").lower(): t for t in market.get("tokens", [])}
+    yes_token = by_outcome.get("yes")
+    no_token = by_outcome.get("no")
+    if not (yes_token and no_token):
+        return None
+    
+    mg = market.get
+    return {
+        "condition_id": mg("condition_id", ""),
+        "question": mg("question", ""),
+        "yes_price": float(yes_token.get("price", 0)),
+        "no_price": float(no_token.get("price", 0)),
+        "yes_token_id": yes_token.get("token_id", ""),
+        "no_token_id": no_token.get("token_id", ""),
+        "volume": float(mg("volume", 0)),
+        "liquidity": float(mg("liquidity", 0)),
+        "end_date": mg("end_date_iso", "")
+    }
 
 class polymarketclient:
     """fetches market data from polymarket's public api"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         # polymarket uses clob api for orderbook data
-        self.clob_url = "https://clob.polymarket.com"
-        self.gamma_url = "https://gamma-api.polymarket.com"
-        self.session = requests.session()
+        self.clob_url = CLOB_URL
+        self.gamma_url = GAMMA_URL
+        self.session = session or build_session()
+        # (url, params) -> (expires_at, parsed json), shared by every scan that uses this client;
+        # scans (and streamlit sessions) share the client across threads, so it's lock guarded
+        self._cache: Dict[tuple, Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+        # (url, params) -> lock held while that request is in flight, so threads that miss
+        # on the same key at once wait for one fetch instead of each hitting the api
+        self._fetch_locks: Dict[tuple, threading.Lock] = {}
+    
+    def _cached(self, key, now: float):
+        """fresh cached response for key, or none"""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        return cached[1] if cached and cached[0] > now else None
         
-    def get_markets(self, limit: int = 50, active: bool = True) -> List[Dict]:
-        """fetch active markets"""
-        try:
-            params = {
-                "limit": limit,
-                "active": str(active).lower()
-            }
-            response = self.session.get(
-                f"{self.gamma_url}/markets",
-                params=params
-            )
+    def _get(self, url: str, params: Optional[dict] = None):
+        """get and parse json, serving repeat requests from the ttl cache"""
+        path = urlsplit(url).path
+        ttl = next((ttl for prefix, ttl in CACHE_TTLS.items() if path.startswith(prefix)), 0)
+        if not ttl:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
+        
+        key = (url, tuple(sorted(params.items())) if params else ())
+        data = self._cached(key, time.monotonic())
+        if data is not None:
+            return data
+        
+        with self._cache_lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # another thread may have fetched it while this one waited
+            now = time.monotonic()
+            data = self._cached(key, now)
+            if data is not None:
+                return data
+            
+            try:
+                response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+            except Exception:
+                # nothing gets cached for a failed fetch, so don't keep its lock around either
+                with self._cache_lock:
+                    self._fetch_locks.pop(key, None)
+                raise
+            
+            with self._cache_lock:
+                # drop anything already expired, in place, so the cache doesn't grow across long runs
+                for expired in [k for k, v in self._cache.items() if v[0] <= now]:
+                    del self._cache[expired]
+                    self._fetch_locks.pop(expired, None)
+                self._cache[key] = (now + ttl, data)
+        return data
+    
+    def clear_cache(self):
+        """drop all cached responses, forcing the next requests to hit the api"""
+        with self._cache_lock:
+            self._cache.clear()
+            self._fetch_locks.clear()
+        
+    def get_markets(self, limit: int = 50, active: bool = True, end_date_max: Optional[str] = None) -> List[Dict]:
+        """fetch active markets, optionally closing no later than end_date_max"""
+        try:
+            params = _markets_params(limit, active, end_date_max)
+            return self._get(f"{self.gamma_url}/markets", params)
         except Exception as e:
             print(f"failed to fetch polymarket markets: {e}")
             return []
     
-    def get_market_orderbook(self, token_id: str) -> dict:
+    def get_market_orderbook(self, token_id: str) -> orderbook:
         """fetch orderbook for a specific market token"""
         try:
-            response = self.session.get(
-                f"{self.clob_url}/book",
-                params={"token_id": token_id}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            bids = data.get("bids", [])
-            asks = data.get("asks", [])
-            
-            return {
-                "token_id": token_id,
-                "best_bid": float(bids[0]["price"]) if bids else None,
-                "best_ask": float(asks[0]["price"]) if asks else None,
-                "bid_size": float(bids[0]["size"]) if bids else 0,
-                "ask_size": float(asks[0]["size"]) if asks else 0,
-                "timestamp": datetime.now().isoformat()
-            }
+            return _parse_orderbook(token_id, self._get(f"{self.clob_url}/book", {"token_id": token_id}))
         except Exception as e:
             print(f"failed to fetch orderbook for {token_id}: {e}")
             return {}
     
-    def get_market_price(self, condition_id: str) -> dict:
+    def get_market_price(self, condition_id: str) -> marketprice:
         """fetch current market price"""
         try:
-            response = self.session.get(
-                f"{self.gamma_url}/markets/{condition_id}"
-            )
-            response.raise_for_status()
-            market = response.json()
-            
-            # polymarket has binary outcomes (yes or no)
-            tokens = market.get("tokens", [])
-            
-            result = {
-                "condition_id": condition_id,
-                "question": market.get("question", ""),
-                "active": market.get("active", False),
-                "closed": market.get("closed", False),
-                "end_date": market.get("end_date_iso", ""),
-                "volume": float(market.get("volume", 0)),
-                "liquidity": float(market.get("liquidity", 0)),
-            }
-            
-            # extract token prices (usually 2 tokens: yes/no)
-            for token in tokens:
-                outcome = token.get("outcome", "").lower()
-                price = float(token.get("price", 0))
-                token_id = token.get("token_id", "")
-                
-                if outcome == "yes":
-                    result["yes_price"] = price
-                    result["yes_token_id"] = token_id
-                elif outcome == "no":
-                    result["no_price"] = price
-                    result["no_token_id"] = token_id
-                    
-            return result
+            return _parse_market_price(condition_id, self._get(f"{self.gamma_url}/markets/{condition_id}"))
         except Exception as e:
             print(f"failed to fetch market price for {condition_id}: {e}")
             return {}
     
+    def get_orderbooks_batch(self, token_ids: List[str]) -> List[orderbook]:
+        """fetch orderbooks for many tokens concurrently, in the same order as token_ids"""
+        async def fetch():
+            async with asyncpolymarketclient() as client:
+                return await client.get_orderbooks_batch(token_ids)
+        
+        return run(fetch())
+    
+    def get_market_prices_batch(self, condition_ids: List[str]) -> List[marketprice]:
+        """fetch prices for many markets concurrently, in the same order as condition_ids"""
+        async def fetch():
+            async with asyncpolymarketclient() as client:
+                return await client.get_market_prices_batch(condition_ids)
+        
+        return run(fetch())
+    
+    def get_market_prices_bulk(self, condition_ids: List[str]) -> Dict[str, marketprice]:
+        """fetch prices for many markets with one request per chunk of ids, keyed by condition id"""
+        prices: Dict[str, marketprice] = {}
+        for start in range(0, len(condition_ids), BULK_CHUNK_SIZE):
+            chunk = condition_ids[start:start + BULK_CHUNK_SIZE]
+            try:
+                markets = self._get(f"{self.gamma_url}/markets", {
+                    "condition_ids": ",".join(chunk),
+                    "limit": len(chunk)
+                })
+                for market in markets:
+                    condition_id = market.get("condition_id", "")
+                    prices[condition_id] = _parse_market_price(condition_id, market)
+            except Exception as e:
+                # fall back to concurrent single-market fetches for this chunk
+                print(f"bulk price fetch failed, fetching individually: {e}")
+                for condition_id, price in zip(chunk, self.get_market_prices_batch(chunk)):
+                    if price:
+                        prices[condition_id] = price
+        
+        return prices
+    
     def search_markets(self, query: str) -> List[Dict]:
         """search for markets by keyword"""
         try:
-            response = self.session.get(
-                f"{self.gamma_url}/search",
-                params={"q": query}
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"{self.gamma_url}/search", {"q": query})
         except Exception as e:
             print(f"failed to search markets: {e}")
             return []
     
-    def get_simplified_markets(self, time_window_hours: Optional[float] = None) -> List[Dict]:
+    def get_simplified_markets(self, time_window_hours: Optional[float] = None) -> List[simplifiedmarket]:
         """fetch markets in simplified format for scanning with optional time window"""
-        markets = self.get_markets(limit=50)  # reduced to avoid rate limits
-        simplified = []
-        
-        # calculate cutoff time if window specified
+        # calculate cutoff time if window specified, in utc to compare against the api's end dates
         cutoff_time = None
+        end_date_max = None
         if time_window_hours:
-            cutoff_time = datetime.now() + timedelta(hours=time_window_hours)
+            cutoff_time = datetime.now(timezone.utc) + timedelta(hours=time_window_hours)
+            end_date_max = cutoff_time.strftime("%Y-%m-%dT%H:%M:%SZ")
         
-        for market in markets:
-            if not market.get("active", False):
-                continue
-            
-            # filter by time window if specified
-            if cutoff_time:
-                end_date_str = market.get("end_date_iso", "")
-                if end_date_str:
-                    try:
-                        end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-                        # skip markets closing after our window
-                        if end_date > cutoff_time:
-                            continue
-                    except:
-                        pass  # include if we can't parse the date
-                
-            tokens = market.get("tokens", [])
-            yes_token = next((t for t in tokens if t.get("outcome", "").lower() == "yes"), None)
-            no_token = next((t for t in tokens if t.get("outcome", "").lower() == "no"), None)
-            
-            if yes_token and no_token:
-                simplified.append({
-                    "condition_id": market.get("condition_id", ""),
-                    "question": market.get("question", ""),
-                    "yes_price": float(yes_token.get("price", 0)),
-                    "no_price": float(no_token.get("price", 0)),
-                    "yes_token_id": yes_token.get("token_id", ""),
-                    "no_token_id": no_token.get("token_id", ""),
-                    "volume": float(market.get("volume", 0)),
-                    "liquidity": float(market.get("liquidity", 0)),
-                    "end_date": market.get("end_date_iso", "")
-                })
+        markets = self.get_markets(
+            limit=50,  # reduced to avoid rate limits
+            end_date_max=end_date_max
+        )
         
-        return simplified
\ No newline at end of file
+        # filter and project in one pass: keep active markets inside the window (rechecked here
+        # in case the server lets any through) and drop those without both outcome tokens
+        return [
+            simplified
+            for market in markets
+            if market.get("active", False) and not (cutoff_time and _closes_after(market, cutoff_time))
+            if (simplified := _simplify_market(market)) is not None
+        ]
+
+class asyncpolymarketclient:
+    """async polymarket client, issues requests concurrently over a pooled aiohttp session"""
+    
+    def __init__(self, max_concurrency: int = 40):
+        self.clob_url = CLOB_URL
+        self.gamma_url = GAMMA_URL
+        self.session: aiohttp.ClientSession = None  # type: ignore[assignment]  # opened in __aenter__
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+    
+    async def _get(self, url: str, params: Optional[dict] = None):
+        async with self._semaphore:
+            async with self.session.get(url, params=params) as response:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
+    
+    async def get_markets(self, limit: int = 50, active: bool = True, end_date_max: Optional[str] = None) -> List[Dict]:
+        """fetch active markets, optionally closing no later than end_date_max"""
+        try:
+            params = _markets_params(limit, active, end_date_max)
+            return await self._get(f"{self.gamma_url}/markets", params)
+        except Exception as e:
+            print(f"failed to fetch polymarket markets: {e}")
+            return []
+    
+    async def get_market_orderbook(self, token_id: str) -> orderbook:
+        """fetch orderbook for a specific market token"""
+        try:
+            return _parse_orderbook(token_id, await self._get(f"{self.clob_url}/book", {"token_id": token_id}))
+        except Exception as e:
+            print(f"failed to fetch orderbook for {token_id}: {e}")
+            return {}
+    
+    async def get_market_price(self, condition_id: str) -> marketprice:
+        """fetch current market price"""
+        try:
+            return _parse_market_price(condition_id, await self._get(f"{self.gamma_url}/markets/{condition_id}"))
+        except Exception as e:
+            print(f"failed to fetch market price for {condition_id}: {e}")
+            return {}
+    
+    async def search_markets(self, query: str) -> List[Dict]:
+        """search for markets by keyword"""
+        try:
+            return await self._get(f"{self.gamma_url}/search", {"q": query})
+        except Exception as e:
+            print(f"failed to search markets: {e}")
+            return []
+    
+    async def get_orderbooks_batch(self, token_ids: List[str]) -> List[orderbook]:
+        """fetch orderbooks for many tokens concurrently"""
+        return await asyncio.gather(*(self.get_market_orderbook(t) for t in token_ids))
+    
+    async def get_market_prices_batch(self, condition_ids: List[str]) -> List[marketprice]:
+        """fetch prices for many markets concurrently"""
+        return await asyncio.gather(*(self.get_market_price(c) for c in condition_ids))
\ No newline at end of file
@@ -5,13 +5,15 @@ Streamlit interface for BetBot scanner
 
 import streamlit as st
 import pandas as pd
-import time
-import json
+import heapq
+import orjson
 from datetime import datetime
+from operator import itemgetter
+from http_client import build_session, use_uvloop
 from kalshi_client import kalshiclient
 from polymarket_client import polymarketclient
-from arbitrage_scanner import arbitragescanner
-from value_scanner import valuescanner
+from arbitrage_scanner import arbitragescanner, all_opportunities
+from value_scanner import valuescanner, all_value, all_extremes
 
 st.set_page_config(
     page_title="BetBot Scanner",
@@ -31,12 +33,84 @@ st.markdown("""
 @st.cache_resource
 def init_clients():
     """initialise api clients (cached)"""
-    kalshi = kalshiclient()
-    polymarket = polymarketclient()
+    use_uvloop()
+    session = build_session()
+    kalshi = kalshiclient(session)
+    polymarket = polymarketclient(session)
     arb_scanner = arbitragescanner(kalshi, polymarket)
     value_scanner = valuescanner(kalshi, polymarket)
     return kalshi, polymarket, arb_scanner, value_scanner
 
+# scanners are passed with a leading underscore so streamlit doesn't try to hash them,
+# results are keyed on the time window alone. the scanners are shared by every session,
+# so the window goes into the scan call rather than onto the scanner (0 = all markets)
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_arbitrage_scan(_arb_scanner, time_window_hours):
+    """arbitrage scan results, reused across reruns for 30s"""
+    return _arb_scanner.scan_all_arbitrage(time_window_hours=time_window_hours or 0)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_value_scan(_value_scanner, time_window_hours):
+    """value scan results, reused across reruns for 30s"""
+    return _value_scanner.scan_all_value(time_window_hours=time_window_hours or 0)
+
+# download payloads are keyed on the scan's own timestamp, so reruns showing the same
+# scan reuse the serialized bytes instead of hashing or re-encoding the results
+@st.cache_data(max_entries=8, show_spinner=False)
+def csv_payload(scan_time, kind, _df):
+    """csv bytes for a table download"""
+    return _df.to_csv(index=False).encode()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def json_payload(scan_time, kind, _items):
+    """indented json bytes for a full results download"""
+    return orjson.dumps(_items, option=orjson.OPT_INDENT_2)
+
+# fixed column order per table, rows missing a column (e.g. internal vs cross-platform) leave it blank
+ARBITRAGE_COLUMNS = [
+    "type", "market", "strategy", "yes price", "no price", "total cost", "gross profit",
+    "total fees", "net profit", "roi %", "kalshi market", "polymarket id", "market id"
+]
+VALUE_COLUMNS = [
+    "platform", "market", "side", "entry price", "fair value", "edge %", "expected profit",
+    "total fees", "net profit", "roi %", "volume", "market id"
+]
+EXTREME_COLUMNS = ["platform", "market", "yes price", "confidence", "volume"]
+
+# column display formats, applied by the styler so the dataframes keep raw numbers
+ARBITRAGE_FORMATS = {
+    "yes price": "${:.3f}",
+    "no price": "${:.3f}",
+    "total cost": "${:.3f}",
+    "gross profit": "${:.3f}",
+    "total fees": "${:.3f}",
+    "net profit": "${:.3f}",
+    "roi %": "{:.2f}%"
+}
+VALUE_FORMATS = {
+    "entry price": "${:.3f}",
+    "fair value": "${:.3f}",
+    "edge %": "{:.2f}%",
+    "expected profit": "${:.3f}",
+    "total fees": "${:.3f}",
+    "net profit": "${:.3f}",
+    "roi %": "{:.2f}%",
+    "volume": "{:,.0f}"
+}
+EXTREME_FORMATS = {
+    "yes price": "${:.3f}",
+    "volume": "{:,.0f}"
+}
+
+def build_table(data, columns, formats):
+    """frame with a fixed column order, the formatted columns typed as floats up front"""
+    df = pd.DataFrame.from_records(data, columns=columns)
+    return df.astype({col: "float64" for col in formats})
+
+def style_table(df, formats):
+    """format numeric columns for display, leaving cells missing for a row blank"""
+    return df.style.format(formats, na_rep="")
+
 def format_profit_color(profit_pct):
     """return color class based on profit percentage"""
     if profit_pct >= 10:
@@ -61,13 +135,13 @@ def display_arbitrage_opportunities(opportunities):
             trade_details = opp.get("trade_details", {})
             data.append({
                 "type": "cross-platform",
-                "market": f"{opp.get('kalshi_title', '')[:40]}",
+                "market": opp.get("kalshi_title", ""),
                 "strategy": opp.get("strategy", ""),
-                "total cost": f"${opp.get('total_cost', 0):.3f}",
-                "gross profit": f"${opp.get('gross_profit', 0):.3f}",
-                "total fees": f"${fees.get('total_fees', 0):.3f}",
-                "net profit": f"${opp.get('net_profit', 0):.3f}",
-                "roi %": f"{opp.get('roi_percentage', 0):.2f}%",
+                "total cost": opp.get("total_cost", 0),
+                "gross profit": opp.get("gross_profit", 0),
+                "total fees": fees.get("total_fees", 0),
+                "net profit": opp.get("net_profit", 0),
+                "roi %": opp.get("roi_percentage", 0),
                 "kalshi market": opp.get("kalshi_market", ""),
                 "polymarket id": opp.get("polymarket_market", "")
             })
@@ -76,19 +150,20 @@ def display_arbitrage_opportunities(opportunities):
             title = opp.get("title", opp.get("question", ""))
             data.append({
                 "type": f"{platform} internal",
-                "market": f"{title[:40]}",
-                "yes price": f"${opp.get('yes_ask', opp.get('yes_price', 0)):.3f}",
-                "no price": f"${opp.get('no_ask', opp.get('no_price', 0)):.3f}",
-                "total cost": f"${opp.get('total_cost', 0):.3f}",
-                "gross profit": f"${opp.get('gross_profit', 0):.3f}",
-                "total fees": f"${fees.get('total_fees', 0):.3f}",
-                "net profit": f"${opp.get('net_profit', 0):.3f}",
-                "roi %": f"{opp.get('roi_percentage', 0):.2f}%",
+                "market": title,
+                "yes price": opp.get("yes_ask", opp.get("yes_price", 0)),
+                "no price": opp.get("no_ask", opp.get("no_price", 0)),
+                "total cost": opp.get("total_cost", 0),
+                "gross profit": opp.get("gross_profit", 0),
+                "total fees": fees.get("total_fees", 0),
+                "net profit": opp.get("net_profit", 0),
+                "roi %": opp.get("roi_percentage", 0),
                 "market id": opp.get("market", "")
             })
     
-    df = pd.DataFrame(data)
-    st.dataframe(df, width='stretch', hide_index=True)
+    df = build_table(data, ARBITRAGE_COLUMNS, ARBITRAGE_FORMATS)
+    df["market"] = df["market"].str.slice(0, 40)
+    st.dataframe(style_table(df, ARBITRAGE_FORMATS), width='stretch', hide_index=True)
     return df
 
 
@@ -106,21 +181,22 @@ def display_value_opportunities(opportunities):
         
         data.append({
             "platform": opp.get("platform", ""),
-            "market": f"{title[:40]}",
+            "market": title,
             "side": opp.get("side", ""),
-            "entry price": f"${opp.get('price', 0):.3f}",
-            "fair value": f"${opp.get('fair_value', 0):.3f}",
-            "edge %": f"{opp.get('edge_percentage', 0):.2f}%",
-            "expected profit": f"${opp.get('expected_profit', 0):.3f}",
-            "total fees": f"${fees.get('total_fees', 0):.3f}",
-            "net profit": f"${opp.get('net_expected_profit', 0):.3f}",
-            "roi %": f"{opp.get('roi_percentage', 0):.2f}%",
-            "volume": f"{opp.get('volume', 0):,.0f}",
+            "entry price": opp.get("price", 0),
+            "fair value": opp.get("fair_value", 0),
+            "edge %": opp.get("edge_percentage", 0),
+            "expected profit": opp.get("expected_profit", 0),
+            "total fees": fees.get("total_fees", 0),
+            "net profit": opp.get("net_expected_profit", 0),
+            "roi %": opp.get("roi_percentage", 0),
+            "volume": opp.get("volume", 0),
             "market id": opp.get("market", "")
         })
     
-    df = pd.DataFrame(data)
-    st.dataframe(df, width='stretch', hide_index=True)
+    df = build_table(data, VALUE_COLUMNS, VALUE_FORMATS)
+    df["market"] = df["market"].str.slice(0, 40)
+    st.dataframe(style_table(df, VALUE_FORMATS), width='stretch', hide_index=True)
     return df
 
 
@@ -135,14 +211,15 @@ def display_extreme_probabilities(opportunities):
         title = opp.get("title", opp.get("question", ""))
         data.append({
             "platform": opp.get("platform", ""),
-            "market": f"{title[:50]}...",
-            "yes price": f"${opp.get('yes_price', 0):.3f}",
+            "market": title,
+            "yes price": opp.get("yes_price", 0),
             "confidence": opp.get("confidence", ""),
-            "volume": f"{opp.get('volume', 0):,.0f}"
+            "volume": opp.get("volume", 0)
         })
     
-    df = pd.DataFrame(data)
-    st.dataframe(df, width='stretch', hide_index=True)
+    df = build_table(data, EXTREME_COLUMNS, EXTREME_FORMATS)
+    df["market"] = df["market"].str.slice(0, 50) + "..."
+    st.dataframe(style_table(df, EXTREME_FORMATS), width='stretch', hide_index=True)
 
 def main():
     st.title("Betbot")
@@ -200,46 +277,24 @@ def main():
     with st.spinner("Initialising clients..."):
         kalshi, polymarket, arb_scanner, value_scanner = init_clients()
     
-    # set time window for scanners
-    arb_scanner.set_time_window(time_window_hours)
-    value_scanner.set_time_window(time_window_hours)
-    
-    # initialize session state for auto-refresh
-    if "last_scan_time" not in st.session_state:
-        st.session_state.last_scan_time = None
-    
-    # auto-refresh logic
     if auto_refresh:
-        current_time = time.time()
+        # the fragment reruns itself every interval in the browser session,
+        # so the script thread never sleeps and the sidebar stays responsive
+        @st.fragment(run_every=refresh_interval)
+        def auto_scan():
+            run_scan_display(scan_type, arb_scanner, value_scanner, st.container(), time_window_option, time_window_hours)
         
-        # run the scan if it's the first time/enough time has passed
-        if (st.session_state.last_scan_time is None or 
-            current_time - st.session_state.last_scan_time >= refresh_interval):
-            
-            st.session_state.last_scan_time = current_time
-            run_scan_display(scan_type, arb_scanner, value_scanner, st.container(), time_window_option)
-            
-            # triggers a rerun after interval
-            time.sleep(refresh_interval)
-            st.rerun()
-        else:
-            # show previous results and countdown
-            time_until_next = refresh_interval - (current_time - st.session_state.last_scan_time)
-            st.info(f"Next scan in {int(time_until_next)} seconds..")
-            time.sleep(1)
-            st.rerun()
+        auto_scan()
     else:
         # manual scan mode
-        st.session_state.last_scan_time = None  # reset when auto-refresh is off
-        
         if st.session_state.get("trigger_scan", False):
             st.session_state.trigger_scan = False
-            run_scan_display(scan_type, arb_scanner, value_scanner, st.container(), time_window_option)
+            run_scan_display(scan_type, arb_scanner, value_scanner, st.container(), time_window_option, time_window_hours)
         else:
             st.info("Click 'run scan now' to start scanning")
 
 
-def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_window_label="all markets"):
+def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_window_label="all markets", time_window_hours=None):
     """run scan and display results"""
     with container:
         scan_time = datetime.now().strftime("%H:%M:%S")
@@ -252,7 +307,7 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
         # run scans based on type
         if scan_type in ["all", "arbitrage"]:
             with st.spinner("Scanning for arbitrage.."):
-                arb_results = arb_scanner.scan_all_arbitrage()
+                arb_results = cached_arbitrage_scan(arb_scanner, time_window_hours)
                 results["arbitrage"] = arb_results
                 
                 total_arb = arb_results["summary"]["total_opportunities"]
@@ -261,7 +316,7 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
         
         if scan_type in ["all", "value"]:
             with st.spinner("Scanning for value.."):
-                value_results = value_scanner.scan_all_value()
+                value_results = cached_value_scan(value_scanner, time_window_hours)
                 results["value"] = value_results
                 
                 total_value = value_results["summary"]["total_value_opportunities"]
@@ -275,20 +330,17 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
         if scan_type in ["all", "arbitrage"] and results.get("arbitrage"):
             arb_results = results["arbitrage"]
             
-            # combine all arbitrage opportunities
-            all_arb = []
-            all_arb.extend(arb_results.get("cross_platform", []))
-            all_arb.extend(arb_results.get("Kalshi_internal", []))
-            all_arb.extend(arb_results.get("Polymarket_internal", []))
+            # a list, since the full json download needs every opportunity
+            all_arb = list(all_opportunities(arb_results))
             
             if all_arb:
                 st.subheader("Arbitrage opportunities")
-                arb_df = display_arbitrage_opportunities(all_arb[:10])  # top 10
+                arb_df = display_arbitrage_opportunities(heapq.nlargest(10, all_arb, key=itemgetter("profit_percentage")))
                 
                 # download button for arbitrage data
                 if arb_df is not None:
                     with download_col1:
-                        csv = arb_df.to_csv(index=False)
+                        csv = csv_payload(arb_results["scan_time"], "arbitrage", arb_df)
                         st.download_button(
                             label="Download arbitrage csv",
                             data=csv,
@@ -297,7 +349,7 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
                         )
                     
                     # also offer full json download
-                    json_data = json.dumps(all_arb, indent=2)
+                    json_data = json_payload(arb_results["scan_time"], "arbitrage", all_arb)
                     st.download_button(
                         label="Download full arbitrage json",
                         data=json_data,
@@ -309,18 +361,16 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
             value_results = results["value"]
             
             # value opportunities
-            all_value = []
-            all_value.extend(value_results.get("kalshi_value", []))
-            all_value.extend(value_results.get("polymarket_value", []))
+            value_bets = list(all_value(value_results))
             
-            if all_value:
+            if value_bets:
                 st.subheader("Value opportunities")
-                value_df = display_value_opportunities(all_value[:10])  # top 10
+                value_df = display_value_opportunities(heapq.nlargest(10, value_bets, key=itemgetter("edge_percentage")))
                 
                 # download button for value data
                 if value_df is not None:
                     with download_col2:
-                        csv = value_df.to_csv(index=False)
+                        csv = csv_payload(value_results["scan_time"], "value", value_df)
                         st.download_button(
                             label="Download value csv",
                             data=csv,
@@ -329,7 +379,7 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
                         )
                     
                     # also offer full json download
-                    json_data = json.dumps(all_value, indent=2)
+                    json_data = json_payload(value_results["scan_time"], "value", value_bets)
                     st.download_button(
                         label="Download full value json",
                         data=json_data,
@@ -338,14 +388,12 @@ def run_scan_display(scan_type, arb_scanner, value_scanner, container, time_wind
                     )
             
             # extreme probabilities
-            all_extreme = []
-            all_extreme.extend(value_results.get("kalshi_extremes", []))
-            all_extreme.extend(value_results.get("polymarket_extremes", []))
+            top_extremes = heapq.nlargest(10, all_extremes(value_results), key=itemgetter("distance"))
             
-            if all_extreme:
+            if top_extremes:
                 st.subheader("Extreme probabilities")
                 with st.expander("Show extreme probability markets"):
-                    display_extreme_probabilities(all_extreme[:10])
+                    display_extreme_probabilities(top_extremes)
         
         st.caption(f"Last updated: {scan_time}")
 
@@ -1,6 +1,76 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Iterator
 from datetime import datetime, timedelta
 import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from itertools import chain
+import numpy as np
+from value_scanner_kernels import sidevalue, value_kernel
+from kalshi_client import _parse_market_details
+
+MARKETS_TTL = 10  # seconds a kalshi market list is reused across the scan methods
+KALSHI_FEE_RATE = 0.07  # 7% kalshi fee on profit
+POLYMARKET_GAS = 0.02  # estimated polygon gas per trade
+
+def _ranked_hits(yes_side: sidevalue, no_side: sidevalue) -> List[int]:
+    """indices of markets with a hit on either side, best edge first (both sides share one edge)"""
+    hits = np.flatnonzero(yes_side.hit | no_side.hit)
+    # stable so markets with equal edges keep their listing order
+    return hits[np.argsort(-yes_side.edge[hits], kind="stable")].tolist()
+
+def _liquid(bets: List[Dict], min_volume: float) -> List[Dict]:
+    """bets whose market has more than min_volume of volume or liquidity"""
+    return [bet for bet in bets if bet["volume"] > min_volume or bet["liquidity"] > min_volume]
+
+def _value_bet(platform: str, market_id: str, name_key: str, name: str, side: str, sv: sidevalue, i: int,
+               platform_fee: float, gas_fee: float, volume: float, liquidity: float, now: datetime,
+               token_id: Optional[str] = None) -> Dict:
+    """
+    output dict for buying one side of market i, shared by both platforms.
+    kalshi names markets by "title", polymarket by "question" and also carries the side's token id.
+    """
+    price = float(sv.price[i])
+    edge = float(sv.edge[i])
+    trade_details = {"action": f"buy {side}", "entry_price": price}
+    if token_id is not None:
+        trade_details["token_id"] = token_id
+    trade_details["position_size"] = 1.0
+    trade_details["max_payout"] = 1.0
+    
+    return {
+        "type": "value_bet",
+        "platform": platform,
+        "market": market_id,
+        name_key: name,
+        "side": side,
+        "trade_details": trade_details,
+        "price": price,
+        "fair_value": float(sv.fair_value[i]),
+        "edge": edge,
+        "edge_percentage": edge * 100,
+        "expected_profit": edge,
+        "fees": {
+            "platform_fee": platform_fee,
+            "gas_fee": gas_fee,
+            "total_fees": platform_fee + gas_fee
+        },
+        "net_expected_profit": float(sv.net_profit[i]),
+        "roi_percentage": float(sv.roi[i]),
+        "volume": volume,
+        "liquidity": liquidity,
+        "timestamp": now
+    }
+
+def all_value(results: dict) -> Iterator[Dict]:
+    """
+    every value bet in a scan_all_value result, chained on demand rather than
+    stored, so logged and cached results hold each bet only once
+    """
+    return chain(results.get("kalshi_value", []), results.get("polymarket_value", []))
+
+def all_extremes(results: dict) -> Iterator[Dict]:
+    """every extreme probability in a scan_all_value result"""
+    return chain(results.get("kalshi_extremes", []), results.get("polymarket_extremes", []))
 
 class valuescanner:
     """scans for high value betting opportunities based on probability analysis"""
@@ -10,282 +80,233 @@ class valuescanner:
         self.polymarket = polymarket_client
         self.min_edge = 0.05  # 5% edge minimum
         self.time_window_hours = None  # no filter by default
+        self._markets_cache = None  # (expires_at, time window, markets)
     
     def set_time_window(self, hours: Optional[float]):
         """set time window for filtering markets"""
         self.time_window_hours = hours
         
-    def find_mispriced_markets(self, platform: str = "kalshi") -> List[Dict]:
-        """
-        finds markets where yes + no prices don't sum to 1,
-        indicating potential value on one side.
-        """
-        opportunities = []
+    def _kalshi_markets(self, time_window_hours: Optional[float]) -> List[Dict]:
+        """open kalshi markets closing within the time window, fetched at most once per MARKETS_TTL"""
+        now = time.monotonic()
+        cached = self._markets_cache
+        if cached and cached[0] > now and cached[1] == time_window_hours:
+            return cached[2]
         
-        if platform == "kalshi":
-            markets = self.kalshi.get_markets(limit=20)  # reduced to avoid rate limits
+        # let the api drop markets closing after the window, so they're never scored
+        params = {"limit": 20, "status": "open"}  # reduced to avoid rate limits
+        if time_window_hours:
+            params["max_close_ts"] = int((datetime.now() + timedelta(hours=time_window_hours)).timestamp())
+        
+        markets = self.kalshi.get_markets(**params)
+        if markets:
+            self._markets_cache = (now + MARKETS_TTL, time_window_hours, markets)
+        return markets
+    
+    def _kalshi_value_bets(self, tickers: List[str], details_list: List[Dict], now: datetime) -> List[Dict]:
+        """value bets on either side of each kalshi market, scored for all markets at once"""
+        if not details_list:
+            return []
+        
+        prices = np.array(
+            [[d.get("yes_ask", 0), d.get("no_ask", 0), d.get("yes_bid", 0), d.get("no_bid", 0)] for d in details_list],
+            dtype=np.float64
+        )
+        yes_ask, no_ask, yes_bid, no_bid = prices.T
+        # a side is only tradeable when it has a bid; kalshi charges a rate on profit, no gas
+        yes_side, no_side = value_kernel(yes_ask, no_ask, yes_bid > 0, no_bid > 0, self.min_edge, KALSHI_FEE_RATE, 0.0)
+        
+        opportunities = []
+        # only markets with a hit on either side get dicts, best edge first and yes before no
+        for i in _ranked_hits(yes_side, no_side):
+            # fields shared by both sides' dicts, read once per market
+            ticker = tickers[i]
+            details = details_list[i]
+            title = details.get("title", "")
+            volume = details.get("volume", 0)
+            open_interest = details.get("open_interest", 0)
             
-            for market in markets:
-                ticker = market.get("ticker", "")
-                details = self.kalshi.get_market_details(ticker)
-                
-                yes_ask = details.get("yes_ask", 0)
-                no_ask = details.get("no_ask", 0)
-                yes_bid = details.get("yes_bid", 0)
-                no_bid = details.get("no_bid", 0)
-                
-                if yes_ask and no_ask:
-                    # if yes + no > 1, platform takes vig (expected)
-                    # if yes + no < 1, there's inefficiency
-                    total_ask = yes_ask + no_ask
-                    
-                    # check for value on yes side
-                    if yes_bid > 0:
-                        implied_prob_yes = yes_ask
-                        fair_value_yes = 1 - no_ask
-                        edge_yes = fair_value_yes - implied_prob_yes
-                        
-                        if edge_yes > self.min_edge:
-                            expected_profit = edge_yes
-                            kalshi_fee = expected_profit * 0.07
-                            net_profit = expected_profit - kalshi_fee
-                            
-                            opportunities.append({
-                                "type": "value_bet",
-                                "platform": "kalshi",
-                                "market": ticker,
-                                "title": details.get("title", ""),
-                                "side": "yes",
-                                "trade_details": {
-                                    "action": "buy yes",
-                                    "entry_price": yes_ask,
-                                    "position_size": 1.0,
-                                    "max_payout": 1.0
-                                },
-                                "price": yes_ask,
-                                "fair_value": fair_value_yes,
-                                "edge": edge_yes,
-                                "edge_percentage": edge_yes * 100,
-                                "expected_profit": expected_profit,
-                                "fees": {
-                                    "platform_fee": kalshi_fee,
-                                    "gas_fee": 0,
-                                    "total_fees": kalshi_fee
-                                },
-                                "net_expected_profit": net_profit,
-                                "roi_percentage": (net_profit / yes_ask) * 100,
-                                "volume": details.get("volume", 0),
-                                "liquidity": details.get("open_interest", 0),
-                                "timestamp": datetime.now().isoformat()
-                            })
-                    
-                    # check for value on no side
-                    if no_bid > 0:
-                        implied_prob_no = no_ask
-                        fair_value_no = 1 - yes_ask
-                        edge_no = fair_value_no - implied_prob_no
-                        
-                        if edge_no > self.min_edge:
-                            expected_profit = edge_no
-                            kalshi_fee = expected_profit * 0.07
-                            net_profit = expected_profit - kalshi_fee
-                            
-                            opportunities.append({
-                                "type": "value_bet",
-                                "platform": "kalshi",
-                                "market": ticker,
-                                "title": details.get("title", ""),
-                                "side": "no",
-                                "trade_details": {
-                                    "action": "buy no",
-                                    "entry_price": no_ask,
-                                    "position_size": 1.0,
-                                    "max_payout": 1.0
-                                },
-                                "price": no_ask,
-                                "fair_value": fair_value_no,
-                                "edge": edge_no,
-                                "edge_percentage": edge_no * 100,
-                                "expected_profit": expected_profit,
-                                "fees": {
-                                    "platform_fee": kalshi_fee,
-                                    "gas_fee": 0,
-                                    "total_fees": kalshi_fee
-                                },
-                                "net_expected_profit": net_profit,
-                                "roi_percentage": (net_profit / no_ask) * 100,
-                                "volume": details.get("volume", 0),
-                                "liquidity": details.get("open_interest", 0),
-                                "timestamp": datetime.now().isoformat()
-                            })
+            for side, sv in (("yes", yes_side), ("no", no_side)):
+                if not sv.hit[i]:
+                    continue
+                opportunities.append(_value_bet(
+                    "kalshi", ticker, "title", title, side, sv, i,
+                    platform_fee=float(sv.fee[i]), gas_fee=0,
+                    volume=volume, liquidity=open_interest, now=now
+                ))
         
-        elif platform == "polymarket":
-            markets = self.polymarket.get_simplified_markets(self.time_window_hours)
+        return opportunities
+    
+    def _polymarket_value_bets(self, markets: List[Dict], now: datetime) -> List[Dict]:
+        """value bets on either side of each simplified polymarket market, scored for all markets at once"""
+        if not markets:
+            return []
+        
+        prices = np.array(
+            [[m.get("yes_price", 0), m.get("no_price", 0)] for m in markets],
+            dtype=np.float64
+        )
+        yes_price, no_price = prices.T
+        # both sides are always tradeable; polymarket costs a flat gas fee per trade
+        yes_side, no_side = value_kernel(yes_price, no_price, True, True, self.min_edge, 0.0, POLYMARKET_GAS)
+        
+        opportunities = []
+        for i in _ranked_hits(yes_side, no_side):
+            market = markets[i]
+            condition_id = market.get("condition_id", "")
+            question = market.get("question", "")
+            volume = market.get("volume", 0)
+            liquidity = market.get("liquidity", 0)
             
-            for market in markets:
-                yes_price = market.get("yes_price", 0)
-                no_price = market.get("no_price", 0)
-                
-                if yes_price and no_price:
-                    # check yes side value
-                    fair_value_yes = 1 - no_price
-                    edge_yes = fair_value_yes - yes_price
-                    
-                    if edge_yes > self.min_edge:
-                        expected_profit = edge_yes
-                        gas_fee = 0.02
-                        net_profit = expected_profit - gas_fee
-                        
-                        opportunities.append({
-                            "type": "value_bet",
-                            "platform": "polymarket",
-                            "market": market.get("condition_id", ""),
-                            "question": market.get("question", ""),
-                            "side": "yes",
-                            "trade_details": {
-                                "action": "buy yes",
-                                "entry_price": yes_price,
-                                "token_id": market.get("yes_token_id", ""),
-                                "position_size": 1.0,
-                                "max_payout": 1.0
-                            },
-                            "price": yes_price,
-                            "fair_value": fair_value_yes,
-                            "edge": edge_yes,
-                            "edge_percentage": edge_yes * 100,
-                            "expected_profit": expected_profit,
-                            "fees": {
-                                "platform_fee": 0,
-                                "gas_fee": gas_fee,
-                                "total_fees": gas_fee
-                            },
-                            "net_expected_profit": net_profit,
-                            "roi_percentage": (net_profit / yes_price) * 100 if yes_price > 0 else 0,
-                            "volume": market.get("volume", 0),
-                            "liquidity": market.get("liquidity", 0),
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    
-                    # check no side value
-                    fair_value_no = 1 - yes_price
-                    edge_no = fair_value_no - no_price
-                    
-                    if edge_no > self.min_edge:
-                        expected_profit = edge_no
-                        gas_fee = 0.02
-                        net_profit = expected_profit - gas_fee
-                        
-                        opportunities.append({
-                            "type": "value_bet",
-                            "platform": "polymarket",
-                            "market": market.get("condition_id", ""),
-                            "question": market.get("question", ""),
-                            "side": "no",
-                            "trade_details": {
-                                "action": "buy no",
-                                "entry_price": no_price,
-                                "token_id": market.get("no_token_id", ""),
-                                "position_size": 1.0,
-                                "max_payout": 1.0
-                            },
-                            "price": no_price,
-                            "fair_value": fair_value_no,
-                            "edge": edge_no,
-                            "edge_percentage": edge_no * 100,
-                            "expected_profit": expected_profit,
-                            "fees": {
-                                "platform_fee": 0,
-                                "gas_fee": gas_fee,
-                                "total_fees": gas_fee
-                            },
-                            "net_expected_profit": net_profit,
-                            "roi_percentage": (net_profit / no_price) * 100 if no_price > 0 else 0,
-                            "volume": market.get("volume", 0),
-                            "liquidity": market.get("liquidity", 0),
-                            "timestamp": datetime.now().isoformat()
-                        })
+            for side, sv in (("yes", yes_side), ("no", no_side)):
+                if not sv.hit[i]:
+                    continue
+                opportunities.append(_value_bet(
+                    "polymarket", condition_id, "question", question, side, sv, i,
+                    platform_fee=0, gas_fee=float(sv.fee[i]),
+                    volume=volume, liquidity=liquidity, now=now,
+                    token_id=market.get(f"{side}_token_id", "")
+                ))
+        
+        return opportunities
+    
+    def _kalshi_extreme(self, ticker: str, details: dict, threshold: float, now: datetime) -> Optional[Dict]:
+        """extreme probability entry for a kalshi market, none if its price isn't extreme"""
+        yes_ask = details.get("yes_ask", 0)
+        
+        if not (yes_ask > threshold or yes_ask < (1 - threshold)):
+            return None
+        
+        return {
+            "type": "extreme_probability",
+            "platform": "kalshi",
+            "market": ticker,
+            "title": details.get("title", ""),
+            "yes_price": yes_ask,
+            "distance": abs(yes_ask - 0.5),
+            "confidence": "high_yes" if yes_ask > threshold else "high_no",
+            "volume": details.get("volume", 0),
+            "liquidity": details.get("open_interest", 0),
+            "close_time": details.get("close_time", ""),
+            "timestamp": now
+        }
+    
+    def _polymarket_extreme(self, market: dict, threshold: float, now: datetime) -> Optional[Dict]:
+        """extreme probability entry for a polymarket market, none if its price isn't extreme"""
+        yes_price = market.get("yes_price", 0)
+        
+        if not (yes_price > threshold or yes_price < (1 - threshold)):
+            return None
         
-        return sorted(opportunities, key=lambda x: x["edge_percentage"], reverse=True)
+        return {
+            "type": "extreme_probability",
+            "platform": "polymarket",
+            "market": market.get("condition_id", ""),
+            "question": market.get("question", ""),
+            "yes_price": yes_price,
+            "distance": abs(yes_price - 0.5),
+            "confidence": "high_yes" if yes_price > threshold else "high_no",
+            "volume": market.get("volume", 0),
+            "liquidity": market.get("liquidity", 0),
+            "end_date": market.get("end_date", ""),
+            "timestamp": now
+        }
+    
+    def _rank(self, value: List[Dict], extremes: List[Dict], min_volume: float) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """order extremes by distance from 50/50 and pick out the liquid value bets"""
+        # value bets already come out of the kernel in edge order; distance is stored at emit time
+        extremes.sort(key=itemgetter("distance"), reverse=True)
+        return value, extremes, _liquid(value, min_volume)
+    
+    def _scan_platform_kalshi(self, threshold: float = 0.9, min_volume: float = 1000, now: Optional[datetime] = None,
+                              time_window_hours: Optional[float] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """value bets, extreme probabilities and liquid value bets from one pass over kalshi"""
+        if now is None:
+            now = datetime.now()
+        markets = self._kalshi_markets(time_window_hours)
+        tickers = [market.get("ticker", "") for market in markets]
+        # the market listing already carries top of book, so it's scored in bulk with no per-market requests
+        details_list = [_parse_market_details(ticker, market) for ticker, market in zip(tickers, markets)]
+        
+        value = self._kalshi_value_bets(tickers, details_list, now)
+        extremes = []
+        for ticker, details in zip(tickers, details_list):
+            extreme = self._kalshi_extreme(ticker, details, threshold, now)
+            if extreme:
+                extremes.append(extreme)
+        
+        return self._rank(value, extremes, min_volume)
+    
+    def _scan_platform_polymarket(self, threshold: float = 0.9, min_volume: float = 1000, now: Optional[datetime] = None,
+                                  time_window_hours: Optional[float] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """value bets, extreme probabilities and liquid value bets from one pass over polymarket"""
+        if now is None:
+            now = datetime.now()
+        markets = self.polymarket.get_simplified_markets(time_window_hours)
+        
+        value = self._polymarket_value_bets(markets, now)
+        extremes = []
+        for market in markets:
+            extreme = self._polymarket_extreme(market, threshold, now)
+            if extreme:
+                extremes.append(extreme)
+        
+        return self._rank(value, extremes, min_volume)
+    
+    def _scan_platform(self, platform: str, threshold: float = 0.9, min_volume: float = 1000) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """fused scan for a platform by name, empty for unknown platforms"""
+        if platform == "kalshi":
+            return self._scan_platform_kalshi(threshold, min_volume, time_window_hours=self.time_window_hours)
+        elif platform == "polymarket":
+            return self._scan_platform_polymarket(threshold, min_volume, time_window_hours=self.time_window_hours)
+        return [], [], []
+    
+    def find_mispriced_markets(self, platform: str = "kalshi", min_volume: Optional[float] = None) -> List[Dict]:
+        """
+        finds markets where yes + no prices don't sum to 1,
+        indicating potential value on one side. pass min_volume to keep only liquid markets.
+        """
+        value = self._scan_platform(platform)[0]
+        return value if min_volume is None else _liquid(value, min_volume)
     
     def find_extreme_probabilities(self, platform: str = "kalshi", threshold: float = 0.9) -> List[Dict]:
         """
         finds markets with extreme probabilities (>90% or <10%).
         these might represent high confidence opportunities or potential traps.
         """
-        opportunities = []
-        
-        if platform == "kalshi":
-            markets = self.kalshi.get_markets(limit=20)  #reduced to avoid the rate limits
-            
-            for market in markets:
-                ticker = market.get("ticker", "")
-                details = self.kalshi.get_market_details(ticker)
-                
-                yes_ask = details.get("yes_ask", 0)
-                
-                if yes_ask > threshold or yes_ask < (1 - threshold):
-                    opportunities.append({
-                        "type": "extreme_probability",
-                        "platform": "kalshi",
-                        "market": ticker,
-                        "title": details.get("title", ""),
-                        "yes_price": yes_ask,
-                        "confidence": "high_yes" if yes_ask > threshold else "high_no",
-                        "volume": details.get("volume", 0),
-                        "liquidity": details.get("open_interest", 0),
-                        "close_time": details.get("close_time", ""),
-                        "timestamp": datetime.now().isoformat()
-                    })
-        
-        elif platform == "polymarket":
-            markets = self.polymarket.get_simplified_markets(self.time_window_hours)
-            
-            for market in markets:
-                yes_price = market.get("yes_price", 0)
-                
-                if yes_price > threshold or yes_price < (1 - threshold):
-                    opportunities.append({
-                        "type": "extreme_probability",
-                        "platform": "polymarket",
-                        "market": market.get("condition_id", ""),
-                        "question": market.get("question", ""),
-                        "yes_price": yes_price,
-                        "confidence": "high_yes" if yes_price > threshold else "high_no",
-                        "volume": market.get("volume", 0),
-                        "liquidity": market.get("liquidity", 0),
-                        "end_date": market.get("end_date", ""),
-                        "timestamp": datetime.now().isoformat()
-                    })
-        
-        return sorted(opportunities, key=lambda x: abs(x["yes_price"] - 0.5), reverse=True)
+        return self._scan_platform(platform, threshold=threshold)[1]
     
     def find_high_liquidity_value(self, platform: str = "kalshi", min_volume: float = 1000) -> List[Dict]:
         """
         finds value opportunities with sufficient liquidity to actually execute.
         filters for markets with good volume.
         """
-        value_bets = self.find_mispriced_markets(platform)
-        
-        # filter for liquidity
-        liquid_opportunities = [
-            bet for bet in value_bets
-            if bet.get("volume", 0) > min_volume or bet.get("liquidity", 0) > min_volume
-        ]
-        
-        return liquid_opportunities
+        return self.find_mispriced_markets(platform, min_volume=min_volume)
     
-    def scan_all_value(self) -> dict:
-        """runs all value scans and returns consolidated results"""
+    def scan_all_value(self, time_window_hours: Optional[float] = None) -> dict:
+        """
+        runs all value scans and returns consolidated results.
+        time_window_hours overrides set_time_window for this scan only (0 scans every market).
+        """
+        window = self.time_window_hours if time_window_hours is None else time_window_hours
+        # one pass per platform yields all three views of it, all stamped with the scan time;
+        # the two platforms share nothing, so their network waits overlap instead of adding up
+        now = datetime.now()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            kalshi_future = executor.submit(self._scan_platform_kalshi, now=now, time_window_hours=window)
+            polymarket_future = executor.submit(self._scan_platform_polymarket, now=now, time_window_hours=window)
+            kalshi_value, kalshi_extremes, kalshi_liquid = kalshi_future.result()
+            polymarket_value, polymarket_extremes, polymarket_liquid = polymarket_future.result()
+        
         results = {
-            "scan_time": datetime.now().isoformat(),
-            "kalshi_value": self.find_mispriced_markets("kalshi"),
-            "polymarket_value": self.find_mispriced_markets("polymarket"),
-            "kalshi_extremes": self.find_extreme_probabilities("kalshi"),
-            "polymarket_extremes": self.find_extreme_probabilities("polymarket"),
-            "kalshi_liquid_value": self.find_high_liquidity_value("kalshi"),
-            "polymarket_liquid_value": self.find_high_liquidity_value("polymarket")
+            "scan_time": now,
+            "kalshi_value": kalshi_value,
+            "polymarket_value": polymarket_value,
+            "kalshi_extremes": kalshi_extremes,
+            "polymarket_extremes": polymarket_extremes,
+            "kalshi_liquid_value": kalshi_liquid,
+            "polymarket_liquid_value": polymarket_liquid
         }
-        
         results["summary"] = {
             "total_value_opportunities": len(results["kalshi_value"]) + len(results["polymarket_value"]),
             "total_extreme_probabilities": len(results["kalshi_extremes"]) + len(results["polymarket_extremes"]),
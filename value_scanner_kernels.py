@@ -0,0 +1,41 @@
+"""
+numpy scoring kernels for the value scanner - they only ever see float64 price arrays,
+never market dicts, so they can be swapped for a compiled version without touching the scanner
+"""
+from typing import Tuple
+from collections import namedtuple
+import numpy as np
+
+# per-side results of the value kernel, one array entry per market
+sidevalue = namedtuple("sidevalue", "hit price fair_value edge fee net_profit roi")
+
+def side_value(price: np.ndarray, fair_value: np.ndarray, edge: np.ndarray, fee: np.ndarray,
+               net_profit: np.ndarray, hit: np.ndarray) -> sidevalue:
+    """one side's view of the shared kernel results, adding its roi on the side's own price"""
+    roi = np.divide(net_profit, price, out=np.zeros_like(price), where=price > 0) * 100
+    return sidevalue(hit, price, fair_value, edge, fee, net_profit, roi)
+
+def value_kernel(yes: np.ndarray, no: np.ndarray, yes_ok, no_ok, min_edge: float,
+                 fee_rate: float, flat_fee: float) -> Tuple[sidevalue, sidevalue]:
+    """
+    yes and no side values for every market in one pass over the price arrays.
+    each side's fair value is one minus the other side's price, so both sides' edge is the
+    same slack (1 - yes - no): a market either has value on both sides or on neither, and
+    which of them is a hit only depends on the side being tradeable. fees are a rate on
+    the edge plus a flat per-trade cost.
+    """
+    slack = 1 - yes - no
+    priced = (yes != 0) & (no != 0) & (slack > min_edge)
+    if not priced.any():
+        # the common case of every market carrying vig: nothing further to score
+        zeros = np.zeros_like(yes)
+        return (
+            sidevalue(priced, yes, zeros, zeros, zeros, zeros, zeros),
+            sidevalue(priced, no, zeros, zeros, zeros, zeros, zeros)
+        )
+    fee = slack * fee_rate + flat_fee
+    net_profit = slack - fee
+    return (
+        side_value(yes, 1 - no, slack, fee, net_profit, priced & yes_ok),
+        side_value(no, 1 - yes, slack, fee, net_profit, priced & no_ok)
+    )